@@ -1,16 +1,92 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import cv2
-from PIL import Image, ImageTk
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+import numpy as np
 import psutil
-import matplotlib
 import logging
+import math
+import queue
+import threading
+import time
+import weakref
 from contextlib import contextmanager
-import GPUtil  # Add this import for GPU monitoring
 
-matplotlib.use('TkAgg')
+try:
+    import pynvml  # Query the GPU through NVML directly
+except ImportError:
+    pynvml = None
+    import GPUtil  # Fall back to nvidia-smi based GPU monitoring
+
+
+def _capture_loop(cap, stop_event, frame_q, dims):
+    """Grab, decode and resize camera frames into PPM data off the Tk thread
+
+    Takes no reference to the app so that the app's finalizer can own the
+    thread. dims is a one-item list holding the displayed (width, height).
+    """
+    ppm_buf = resize_buf = None
+    while not stop_event.is_set():
+        try:
+            # grab() blocks until the camera delivers a frame, so every
+            # successful grab is new; a slow UI is handled by the queue
+            if not cap.grab():
+                stop_event.wait(0.01)
+                continue
+            ret, frame = cap.retrieve()
+            if not ret:
+                continue
+
+            target_width, target_height = dims[0]
+            if (resize_buf is None
+                    or resize_buf.shape[:2] != (target_height, target_width)):
+                # PPM header + pixel buffer, with a view of its pixels as the
+                # resize output; reallocated only when the size changes
+                header = b'P6\n%d %d\n255\n' % (target_width, target_height)
+                ppm_buf = bytearray(len(header) + target_height * target_width * 3)
+                ppm_buf[:len(header)] = header
+                resize_buf = np.frombuffer(
+                    ppm_buf, dtype=np.uint8, offset=len(header)
+                ).reshape(target_height, target_width, 3)
+
+            # Resize the raw BGR frame maintaining aspect ratio straight into
+            # the PPM payload
+            cv2.resize(frame, (target_width, target_height), dst=resize_buf,
+                       interpolation=cv2.INTER_AREA)
+            # Convert BGR to RGB and flip horizontally in place: reversing the
+            # bytes of each row both swaps channels and mirrors the pixels
+            rows = resize_buf.reshape(target_height, target_width * 3)
+            cv2.flip(rows, 1, dst=rows)
+            # Hand the UI a snapshot tagged with its size so it can drop the
+            # frame after a resize
+            frame = ((target_width, target_height), bytes(ppm_buf))
+
+            # Replace any frame the UI has not picked up yet
+            try:
+                frame_q.put_nowait(frame)
+            except queue.Full:
+                try:
+                    frame_q.get_nowait()
+                except queue.Empty:
+                    pass
+                frame_q.put_nowait(frame)
+        except Exception:
+            # Log instead of letting the thread die silently
+            logging.getLogger(__name__).exception("Error during camera capture")
+            stop_event.wait(0.1)
+
+
+def _shutdown_capture(stop_event, thread, cap):
+    """Stop the capture thread, then release the camera once it has exited"""
+    stop_event.set()
+    if thread.is_alive():
+        thread.join(timeout=1.0)
+        if thread.is_alive():
+            # Still blocked inside grab(); releasing now could crash OpenCV
+            logging.getLogger(__name__).warning(
+                "Capture thread did not stop; not releasing camera")
+            return
+    if cap.isOpened():
+        cap.release()
 
 
 # Custom exceptions
@@ -29,6 +105,8 @@ class App:
         # Configure logging
         logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
         self.logger = logging.getLogger(__name__)
+        # Operations that have already shown an error dialog
+        self._error_shown = set()
 
         try:
             self.root = root
@@ -39,12 +117,9 @@ class App:
             self.root.grid_rowconfigure(0, weight=1)
             self.root.grid_columnconfigure(0, weight=1)
 
-            # Variables to store scheduled task IDs with validation
-            self._cancel_scheduled_tasks()
-            self.video_task = None
-            self.memory_task = None
-            self.cpu_task = None
-            self.gpu_task = None  # Add GPU task
+            # Scheduled task IDs keyed by task name
+            self._tasks = {}
+            self._metrics_tick = 0
 
             # Flag to track if the application is running
             self.running = True
@@ -73,14 +148,40 @@ class App:
         self.video_frame.grid_rowconfigure(0, weight=1)
         self.video_frame.grid_columnconfigure(0, weight=1)
 
+        # Cache target video size; only recomputed when the frame is resized.
+        # The capture thread reads it through a shared one-item list
+        self._video_dims = None
+        self._capture_dims = [(320, 240)]
+        self.video_frame.bind('<Configure>', self._on_video_resize)
+
         # Create video label with small padding to show red border and center it
         self.video_label = ttk.Label(self.video_frame, padding=2)
         self.video_label.place(relx=0.5, rely=0.5, anchor=tk.CENTER)
 
-        # Create figure for pie chart
-        self.fig, self.ax = plt.subplots(figsize=(4, 3))
-        self.canvas = FigureCanvasTkAgg(self.fig, master=self.main_frame)
-        self.canvas.get_tk_widget().grid(row=1, column=0, pady=(0, 10))
+        # Reuse one PhotoImage for every frame; replaced only on resize
+        self._photo = tk.PhotoImage(width=320, height=240)
+        self.video_label.configure(image=self._photo)
+
+        # Create canvas for the memory pie chart
+        self.pie_canvas = tk.Canvas(self.main_frame, width=300, height=220,
+                                    highlightthickness=0)
+        self.pie_canvas.grid(row=1, column=0, pady=(0, 10))
+        self.pie_canvas.create_text(150, 12, text='Memory Usage',
+                                    font=('Arial', 12))
+
+        # Create the pie items once; updates only change their extent/text
+        self._pie_center = (150, 120)
+        self._pie_radius = 90
+        pie_box = (60, 30, 240, 210)
+        self._arc_used = self.pie_canvas.create_arc(
+            *pie_box, start=90, extent=0, fill='#ff9999', outline='white')
+        self._arc_free = self.pie_canvas.create_arc(
+            *pie_box, start=90, extent=359.9, fill='#66b3ff', outline='white')
+        self._text_used = self.pie_canvas.create_text(
+            *self._pie_center, justify=tk.CENTER, font=('Arial', 9))
+        self._text_free = self.pie_canvas.create_text(
+            *self._pie_center, justify=tk.CENTER, font=('Arial', 9))
+        self._last_gb = (None, None)
 
         # Create CPU load frame and widgets
         self.cpu_frame = ttk.Frame(self.main_frame)
@@ -92,7 +193,7 @@ class App:
 
         self.cpu_bar = ttk.Progressbar(self.cpu_frame, length=200,
                                        mode='determinate',
-                                       style='CPU.Horizontal.TProgressbar')
+                                       style='CPULow.Horizontal.TProgressbar')
         self.cpu_bar.grid(row=0, column=1, sticky='ew')
 
         # Create GPU load frame and widgets
@@ -105,113 +206,206 @@ class App:
 
         self.gpu_bar = ttk.Progressbar(self.gpu_frame, length=200,
                                       mode='determinate',
-                                      style='GPU.Horizontal.TProgressbar')
+                                      style='GPULow.Horizontal.TProgressbar')
         self.gpu_bar.grid(row=0, column=1, sticky='ew')
 
-        # Configure progress bar styles
+        # Configure progress bar styles once; updates only switch between
+        # the (low, mid, high) load tiers
         style = ttk.Style()
-        style.configure('CPU.Horizontal.TProgressbar',
-                        troughcolor='#E0E0E0',
-                        background='#2196F3')
-        style.configure('GPU.Horizontal.TProgressbar',
-                        troughcolor='#E0E0E0',
-                        background='#4CAF50')  # Green for GPU
+        self._cpu_styles = ('CPULow.Horizontal.TProgressbar',
+                            'CPUMid.Horizontal.TProgressbar',
+                            'CPUHigh.Horizontal.TProgressbar')
+        self._gpu_styles = ('GPULow.Horizontal.TProgressbar',
+                            'GPUMid.Horizontal.TProgressbar',
+                            'GPUHigh.Horizontal.TProgressbar')
+        for name, color in zip(self._cpu_styles + self._gpu_styles,
+                               ('#2196F3', '#FFA726', '#FF5252',  # Blue, orange, red
+                                '#4CAF50', '#FFA726', '#FF5252')):  # Green for GPU
+            style.configure(name, troughcolor='#E0E0E0', background=color)
+
+        # Cache an NVML handle for the first GPU
+        self._nvml_h = None
+        self._nvml_inited = False
+        if pynvml is not None:
+            try:
+                pynvml.nvmlInit()
+                self._nvml_inited = True
+                self._nvml_h = pynvml.nvmlDeviceGetHandleByIndex(0)
+            except pynvml.NVMLError as e:
+                self.logger.warning(f"NVML unavailable: {e}")
+
+        # Throttled psutil results (currently cpu_freq), keyed by call
+        self._psutil_cache = {}
 
         # Initialize video capture
         self.cap = cv2.VideoCapture(0)
+        # Request compressed frames near display size so the camera does
+        # the downscaling instead of the CPU
+        self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+        self.cap.set(cv2.CAP_PROP_FPS, 30)
+        # Keep only the newest frame in the driver buffer to avoid lag
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        self._fps = self.cap.get(cv2.CAP_PROP_FPS) or 30
+
+        # Capture runs on a worker thread; only the newest frame is kept
+        self._frame_q = queue.Queue(maxsize=1)
+        self._stop_event = threading.Event()
+        self._capture_thread = threading.Thread(
+            target=_capture_loop,
+            args=(self.cap, self._stop_event, self._frame_q, self._capture_dims),
+            daemon=True)
+        # Stop capture and release the camera at the latest at interpreter exit
+        self._cap_finalizer = weakref.finalize(
+            self, _shutdown_capture, self._stop_event, self._capture_thread,
+            self.cap)
         if not self.cap.isOpened():
             print("Error: Could not open camera")
         else:
+            self._capture_thread.start()
             self.update_video()
             self.update_memory_chart()
             self.update_cpu_load()
             self.update_gpu_load()  # Start GPU monitoring
+            self._schedule('metrics', 500, self._tick_metrics)
 
-    def _cancel_scheduled_tasks(self):
-        """Cancel all scheduled tasks"""
-        for attribute in ('video_task', 'memory_task', 'cpu_task', 'gpu_task'):
-            task_id = getattr(self, attribute, None)
-            if task_id:
-                self.root.after_cancel(task_id)
+    def _schedule(self, name, ms, fn):
+        """Schedule fn after ms, replacing any pending task with that name"""
+        old = self._tasks.pop(name, None)
+        if old:
+            self.root.after_cancel(old)
+
+        def run():
+            # Forget the ID once it has fired so it is never cancelled later
+            self._tasks.pop(name, None)
+            fn()
+
+        self._tasks[name] = self.root.after(ms, run)
 
     @contextmanager
     def error_handler(self, operation):
         """Context manager for handling operations with proper error logging"""
         try:
             yield
-        except Exception as e:
-            self.logger.error(f"Error during {operation}: {e}")
-            messagebox.showerror("Error", f"An error occurred during {operation}")
+        except Exception:
+            self.logger.exception(f"Error during {operation}")
+            # Show the dialog once per operation, outside the current callback,
+            # so a modal never blocks a scheduled update
+            if operation not in self._error_shown:
+                self._error_shown.add(operation)
+                self.root.after_idle(lambda: messagebox.showerror(
+                    "Error", f"An error occurred during {operation}"))
             raise
 
+    def _on_video_resize(self, event):
+        """Recompute the cached video size when the video frame is resized"""
+        # Ensure minimum size
+        target_width = max(320, event.width - 4)  # -4 for padding
+        target_height = max(240, event.height - 4)  # -4 for padding
+
+        # Calculate aspect ratio
+        aspect_ratio = 4/3  # Standard webcam aspect ratio
+
+        # Adjust dimensions to maintain aspect ratio
+        if target_width/target_height > aspect_ratio:
+            target_width = int(target_height * aspect_ratio)
+        else:
+            target_height = int(target_width / aspect_ratio)
+
+        if (target_width, target_height) != self._video_dims:
+            self._video_dims = (target_width, target_height)
+            self._capture_dims[0] = self._video_dims
+            self._photo = tk.PhotoImage(width=target_width, height=target_height)
+            self.video_label.configure(image=self._photo)
+
     def update_video(self):
         if not self.running:
             return
-        ret, frame = self.cap.read()
-        if ret:
-            # Convert frame from BGR to RGB
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            
-            # Get current window size
-            window_width = self.video_frame.winfo_width()
-            window_height = self.video_frame.winfo_height()
-            
-            # Ensure minimum size
-            target_width = max(320, window_width - 4)  # -4 for padding
-            target_height = max(240, window_height - 4)  # -4 for padding
-            
-            # Calculate aspect ratio
-            aspect_ratio = 4/3  # Standard webcam aspect ratio
-            
-            # Adjust dimensions to maintain aspect ratio
-            if target_width/target_height > aspect_ratio:
-                target_width = int(target_height * aspect_ratio)
-            else:
-                target_height = int(target_width / aspect_ratio)
-            
-            # Convert to PIL Image
-            image = Image.fromarray(frame)
-            # Flip the image horizontally
-            image = image.transpose(Image.Transpose.FLIP_LEFT_RIGHT)
-            # Resize image maintaining aspect ratio
-            image = image.resize((target_width, target_height), Image.Resampling.LANCZOS)
-            # Convert to PhotoImage
-            photo = ImageTk.PhotoImage(image=image)
-            # Update label
-            self.video_label.configure(image=photo)
-            self.video_label.image = photo
-            
-        # Schedule the next update
+        try:
+            frame = self._frame_q.get_nowait()
+        except queue.Empty:
+            frame = None
+        # Skip frames captured at the size in use before the last resize
+        if frame is not None and frame[0] == self._capture_dims[0]:
+            # Overwrite the shown PhotoImage with the PPM data, bypassing PIL
+            self._photo.configure(data=frame[1], format='PPM')
+
+        # Poll at half the frame period so late Tk timers never let a frame
+        # be replaced in the queue before it is shown
         if self.running:
-            self.video_task = self.root.after(10, self.update_video)
+            delay = max(1, int(500 / self._fps))
+            self._schedule('video', delay, self.update_video)
+
+    def _cached(self, key, ttl, fn):
+        """Return the cached result for key while younger than ttl seconds,
+        otherwise call fn() and cache its result"""
+        now = time.monotonic()
+        entry = self._psutil_cache.get(key)
+        if entry and now - entry[0] < ttl:
+            return entry[1]
+        value = fn()
+        self._psutil_cache[key] = (now, value)
+        return value
+
+    def _tick_metrics(self):
+        """Run the slow metric pollers from a single staggered timer"""
+        if not self.running:
+            return
+        self._metrics_tick += 1
+        try:
+            # Every 2nd tick (1 s) for CPU; memory and GPU every 4th (2 s),
+            # offset from each other so they never share a tick
+            if self._metrics_tick % 2 == 0:
+                self.update_cpu_load()
+            if self._metrics_tick % 4 == 1:
+                self.update_memory_chart()
+            if self._metrics_tick % 4 == 3:
+                self.update_gpu_load()
+        finally:
+            # Schedule next update even if a poller failed
+            if self.running:
+                self._schedule('metrics', 500, self._tick_metrics)
+
+    def _place_pie_label(self, item, start, extent):
+        """Move a pie label to the middle of its slice"""
+        mid = math.radians(start + extent / 2)
+        center_x, center_y = self._pie_center
+        distance = 0.6 * self._pie_radius
+        self.pie_canvas.coords(item,
+                               center_x + distance * math.cos(mid),
+                               center_y - distance * math.sin(mid))
 
     def update_memory_chart(self):
         if not self.running:
             return
-        # Clear previous plot
-        self.ax.clear()
-
         # Get memory info
         memory = psutil.virtual_memory()
         used = memory.used / (1024 * 1024 * 1024)  # Convert to GB
         available = memory.available / (1024 * 1024 * 1024)  # Convert to GB
 
-        # Create pie chart
-        sizes = [used, available]
-        labels = [f'Used\n{used:.1f} GB', f'Available\n{available:.1f} GB']
-        colors = ['#ff9999', '#66b3ff']
-
-        self.ax.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%',
-                    startangle=90)
-        self.ax.axis('equal')
-        self.fig.suptitle('Memory Usage', y=0.95)
-
-        # Redraw canvas
-        self.canvas.draw()
-
-        # Schedule next update
-        if self.running:
-            self.memory_task = self.root.after(1000, self.update_memory_chart)
+        # Skip the update if the displayed values have not changed
+        displayed_gb = (round(used, 1), round(available, 1))
+        if displayed_gb == self._last_gb:
+            return
+        self._last_gb = displayed_gb
+
+        # Resize the slices instead of rebuilding the pie
+        frac = used / (used + available)
+        used_extent = frac * 360
+        free_extent = 360 - used_extent
+        self.pie_canvas.itemconfigure(self._arc_used, extent=used_extent)
+        self.pie_canvas.itemconfigure(self._arc_free, start=90 + used_extent,
+                                      extent=free_extent)
+
+        self.pie_canvas.itemconfigure(
+            self._text_used,
+            text=f'Used\n{used:.1f} GB\n{frac * 100:.1f}%')
+        self.pie_canvas.itemconfigure(
+            self._text_free,
+            text=f'Available\n{available:.1f} GB\n{(1 - frac) * 100:.1f}%')
+        self._place_pie_label(self._text_used, 90, used_extent)
+        self._place_pie_label(self._text_free, 90 + used_extent, free_extent)
 
     def update_cpu_load(self):
         if not self.running:
@@ -219,30 +413,38 @@ class App:
         try:
             # Get CPU usage percentage (averaged across all cores)
             cpu_percent = psutil.cpu_percent(interval=None)
-            # Get CPU frequency
-            cpu_freq = psutil.cpu_freq().current / 1000  # Convert MHz to GHz
+            # Get CPU frequency; it changes slowly, so refresh every 5 s
+            cpu_freq = self._cached('cpu_freq', 5.0, psutil.cpu_freq).current / 1000  # Convert MHz to GHz
 
             # Update progress bar and label
             self.cpu_bar['value'] = cpu_percent
             self.cpu_label.config(text=f"CPU Load: {cpu_percent:.1f}% ({cpu_freq:.2f} GHz)")
 
             # Change progress bar color based on CPU load
-            style = ttk.Style()
-            if cpu_percent > 80:
-                style.configure('CPU.Horizontal.TProgressbar',background='#FF5252')  # Red
-            elif cpu_percent > 60:
-                style.configure('CPU.Horizontal.TProgressbar',background='#FFA726')  # Orange
-            else:
-                style.configure('CPU.Horizontal.TProgressbar',background='#2196F3')  # Blue
+            tier = (cpu_percent > 60) + (cpu_percent > 80)
+            self.cpu_bar.configure(style=self._cpu_styles[tier])
 
         except Exception as e:
             print(f"Error reading CPU load: {e}")
             self.cpu_label.config(text="CPU Load: Error")
             self.cpu_bar['value'] = 0
 
-        # Schedule next update
-        if self.running:
-            self.cpu_task = self.root.after(1000, self.update_cpu_load)
+    def _read_gpu(self):
+        """Return (load %, memory used MB, temperature °C) of the first GPU"""
+        if pynvml is None:
+            gpus = GPUtil.getGPUs()
+            if not gpus:
+                return None
+            gpu = gpus[0]
+            return gpu.load * 100, gpu.memoryUsed, gpu.temperature
+
+        if self._nvml_h is None:
+            return None
+        utilization = pynvml.nvmlDeviceGetUtilizationRates(self._nvml_h)
+        memory = pynvml.nvmlDeviceGetMemoryInfo(self._nvml_h)
+        temperature = pynvml.nvmlDeviceGetTemperature(
+            self._nvml_h, pynvml.NVML_TEMPERATURE_GPU)
+        return utilization.gpu, memory.used / (1024 * 1024), temperature
 
     def update_gpu_load(self):
         """Update GPU load information"""
@@ -251,27 +453,18 @@ class App:
             
         try:
             # Try to get GPU information
-            gpus = GPUtil.getGPUs()
-            
-            if gpus:
-                # Get the first GPU
-                gpu = gpus[0]
-                gpu_load = gpu.load * 100  # Convert to percentage
-                gpu_memory = gpu.memoryUsed
-                gpu_temp = gpu.temperature
-                
+            gpu = self._read_gpu()
+
+            if gpu:
+                gpu_load, gpu_memory, gpu_temp = gpu
+
                 # Update progress bar and label
                 self.gpu_bar['value'] = gpu_load
                 self.gpu_label.config(text=f"GPU Load: {gpu_load:.1f}% ({gpu_memory:.0f}MB, {gpu_temp}°C)")
                 
                 # Change progress bar color based on GPU load
-                style = ttk.Style()
-                if gpu_load > 80:
-                    style.configure('GPU.Horizontal.TProgressbar', background='#FF5252')  # Red
-                elif gpu_load > 60:
-                    style.configure('GPU.Horizontal.TProgressbar', background='#FFA726')  # Orange
-                else:
-                    style.configure('GPU.Horizontal.TProgressbar', background='#4CAF50')  # Green
+                tier = (gpu_load > 60) + (gpu_load > 80)
+                self.gpu_bar.configure(style=self._gpu_styles[tier])
             else:
                 self.gpu_label.config(text="GPU: Not detected")
                 self.gpu_bar['value'] = 0
@@ -280,10 +473,6 @@ class App:
             self.logger.error(f"Error reading GPU load: {e}")
             self.gpu_label.config(text="GPU Load: Error")
             self.gpu_bar['value'] = 0
-            
-        # Schedule next update
-        if self.running:
-            self.gpu_task = self.root.after(1000, self.update_gpu_load)
 
     def _safe_cleanup(self):
         """Safely cleanup resources with error handling"""
@@ -296,9 +485,9 @@ class App:
 
     def _stop_all_tasks(self):
         """Stop all scheduled tasks"""
-        for task_id in (self.video_task, self.memory_task, self.cpu_task, self.gpu_task):
-            if task_id:
-                self.root.after_cancel(task_id)
+        for task_id in self._tasks.values():
+            self.root.after_cancel(task_id)
+        self._tasks.clear()
 
     def _handle_cleanup_error(self, exc):
         """Handle any errors that occur during cleanup"""
@@ -311,22 +500,15 @@ class App:
             self.running = False
 
             # Cancel all scheduled tasks
-            if hasattr(self, 'video_task') and self.video_task:
-                self.root.after_cancel(self.video_task)
-            if hasattr(self, 'memory_task') and self.memory_task:
-                self.root.after_cancel(self.memory_task)
-            if hasattr(self, 'cpu_task') and self.cpu_task:
-                self.root.after_cancel(self.cpu_task)
-            if hasattr(self, 'gpu_task') and self.gpu_task:
-                self.root.after_cancel(self.gpu_task)
-
-            # Release camera with check
-            if hasattr(self, 'cap') and self.cap and self.cap.isOpened():
-                self.cap.release()
-
-            # Close matplotlib resources
-            if hasattr(self, 'fig'):
-                plt.close(self.fig)
+            self._stop_all_tasks()
+
+            # Stop the capture thread and release the camera now rather
+            # than waiting for the finalizer
+            self._cap_finalizer()
+
+            # Release NVML
+            if self._nvml_inited:
+                pynvml.nvmlShutdown()
 
             # Clear any remaining tasks
             for task in self.root.tk.call('after', 'info'):
@@ -342,11 +524,6 @@ class App:
             self.root.quit()
             self.root.destroy()
 
-    def __del__(self):
-        """Destructor to ensure camera is released"""
-        if hasattr(self, 'cap') and self.cap and self.cap.isOpened():
-            self.cap.release()
-
 
 def main():
     """Main entry point for the application"""